@@ -4,9 +4,10 @@
 """Manage batteries and inverters for the power distributor."""
 
 import asyncio
+import collections
 import collections.abc
 import logging
-import math
+import operator
 import typing
 from datetime import timedelta
 
@@ -35,7 +36,7 @@ _logger = logging.getLogger(__name__)
 
 
 def _get_all_from_map(
-    source: dict[int, frozenset[int]], keys: collections.abc.Set[int]
+    source: dict[int, tuple[int, ...]], keys: collections.abc.Iterable[int]
 ) -> set[int]:
     """Get all values for the given keys from the given map.
 
@@ -46,7 +47,26 @@ def _get_all_from_map(
     Returns:
         Set of values for the given keys.
     """
-    return set().union(*[source[key] for key in keys])
+    values: set[int] = set()
+    for key in keys:
+        values.update(source[key])
+    return values
+
+
+def _union_mask(source: dict[int, int], keys: collections.abc.Iterable[int]) -> int:
+    """Get the union of the bitmasks for the given keys from the given map.
+
+    Args:
+        source: map from component IDs to bitmasks.
+        keys: keys to get the bitmasks for.
+
+    Returns:
+        The bitwise OR of the bitmasks for the given keys.
+    """
+    mask = 0
+    for key in keys:
+        mask |= source[key]
+    return mask
 
 
 def _get_battery_inverter_mappings(
@@ -55,7 +75,7 @@ def _get_battery_inverter_mappings(
     inv_bats: bool = True,
     bat_bats: bool = True,
     inv_invs: bool = True,
-) -> dict[str, dict[int, frozenset[int]]]:
+) -> dict[str, dict[int, tuple[int, ...]]]:
     """Create maps between battery and adjacent inverters.
 
     Args:
@@ -104,12 +124,13 @@ def _get_battery_inverter_mappings(
             if inv_invs_map is not None:
                 inv_invs_map.setdefault(inverter, set()).update(bat_invs_map)
 
-    mapping: dict[str, dict[int, frozenset[int]]] = {}
+    mapping: dict[str, dict[int, tuple[int, ...]]] = {}
 
-    # Convert sets to frozensets to make them hashable.
+    # Convert sets to sorted tuples: they are hashable, cheaper to iterate and,
+    # being sorted, equal sets still compare (and hash) equal.
     def _add(key: str, value: dict[int, set[int]] | None) -> None:
         if value is not None:
-            mapping[key] = {k: frozenset(v) for k, v in value.items()}
+            mapping[key] = {k: tuple(sorted(v)) for k, v in value.items()}
 
     _add("bat_invs", bat_invs_map)
     _add("inv_bats", inv_bats_map)
@@ -119,6 +140,81 @@ def _get_battery_inverter_mappings(
     return mapping
 
 
+class _PairBounds(typing.NamedTuple):
+    """The power bounds of a battery and adjacent inverter data pair."""
+
+    bat_incl_lo: float
+    """The inclusion lower bound of the (aggregated) battery."""
+
+    bat_incl_hi: float
+    """The inclusion upper bound of the (aggregated) battery."""
+
+    bat_excl_lo: float
+    """The exclusion lower bound of the (aggregated) battery."""
+
+    bat_excl_hi: float
+    """The exclusion upper bound of the (aggregated) battery."""
+
+    inv_incl_lo: float
+    """The sum of the active power inclusion lower bounds of the inverters."""
+
+    inv_incl_hi: float
+    """The sum of the active power inclusion upper bounds of the inverters."""
+
+    inv_excl_lo: float
+    """The sum of the active power exclusion lower bounds of the inverters."""
+
+    inv_excl_hi: float
+    """The sum of the active power exclusion upper bounds of the inverters."""
+
+
+_get_crucial_battery_metrics = operator.attrgetter(
+    "soc",
+    "soc_lower_bound",
+    "soc_upper_bound",
+    "capacity",
+    "power_inclusion_lower_bound",
+    "power_inclusion_upper_bound",
+)
+"""Get the battery metrics that can't be NaN for the power distribution."""
+
+_get_inverter_bounds = operator.attrgetter(
+    "active_power_inclusion_lower_bound",
+    "active_power_inclusion_upper_bound",
+    "active_power_exclusion_lower_bound",
+    "active_power_exclusion_upper_bound",
+)
+"""Get the active power inclusion lower/upper and exclusion lower/upper bounds."""
+
+
+def _sum_inverter_bounds(
+    inverter_data: list[InverterData],
+) -> tuple[float, float, float, float] | None:
+    """Sum the active power bounds of the given inverters.
+
+    Args:
+        inverter_data: the data of the inverters to sum the bounds for.
+
+    Returns:
+        The summed active power inclusion lower/upper and exclusion lower/upper
+            bounds, or None if any inclusion bound is NaN.
+    """
+    inv_incl_lo = inv_incl_hi = inv_excl_lo = inv_excl_hi = 0.0
+    for inverter in inverter_data:
+        incl_lo, incl_hi, excl_lo, excl_hi = _get_inverter_bounds(inverter)
+        # Only the inclusion bounds are crucial for the distribution. NaN is the
+        # only value that is not equal to itself, and this is cheaper than
+        # math.isnan() in this hot path.
+        # pylint: disable-next=comparison-with-itself
+        if incl_lo != incl_lo or incl_hi != incl_hi:
+            return None
+        inv_incl_lo += incl_lo
+        inv_incl_hi += incl_hi
+        inv_excl_lo += excl_lo
+        inv_excl_hi += excl_hi
+    return inv_incl_lo, inv_incl_hi, inv_excl_lo, inv_excl_hi
+
+
 class BatteryManager(ComponentManager):
     """Class to manage the data streams for batteries."""
 
@@ -127,17 +223,34 @@ class BatteryManager(ComponentManager):
         component_pool_status_sender: Sender[ComponentPoolStatus],
     ):
         """Initialize the battery data manager."""
-        self._batteries = connection_manager.get().component_graph.components(
+        batteries = connection_manager.get().component_graph.components(
             component_categories={ComponentCategory.BATTERY}
         )
-        self._battery_ids = {battery.component_id for battery in self._batteries}
+        self._battery_ids = {battery.component_id for battery in batteries}
 
-        maps = _get_battery_inverter_mappings(self._battery_ids)
+        maps = _get_battery_inverter_mappings(self._battery_ids, inv_invs=False)
 
         self._bat_invs_map = maps["bat_invs"]
         self._inv_bats_map = maps["inv_bats"]
         self._bat_bats_map = maps["bat_bats"]
-        self._inv_invs_map = maps["inv_invs"]
+
+        # Sets of batteries are also represented as bitmasks, with one bit per
+        # battery, so unions, differences and comparisons in the request path
+        # are single int operations. Python ints are unbounded, so this works
+        # for any number of batteries.
+        self._bit_batteries: list[int] = sorted(self._bat_invs_map)
+        self._battery_bits: dict[int, int] = {
+            battery_id: 1 << bit for bit, battery_id in enumerate(self._bit_batteries)
+        }
+        inv_bats_mask = {
+            inv_id: _union_mask(self._battery_bits, bat_ids)
+            for inv_id, bat_ids in self._inv_bats_map.items()
+        }
+        # The batteries connected to the inverters of each battery.
+        self._bat_inv_bats_mask: dict[int, int] = {
+            bat_id: _union_mask(inv_bats_mask, inv_ids)
+            for bat_id, inv_ids in self._bat_invs_map.items()
+        }
 
         self._battery_caches: dict[int, LatestValueCache[BatteryData]] = {}
         self._inverter_caches: dict[int, LatestValueCache[InverterData]] = {}
@@ -163,6 +276,22 @@ class BatteryManager(ComponentManager):
         )
         """The distribution algorithm used to distribute power between batteries."""
 
+    def _mask_to_ids(self, mask: int) -> set[int]:
+        """Convert a bitmask of batteries to a set of battery IDs.
+
+        Args:
+            mask: the bitmask to convert.
+
+        Returns:
+            The IDs of the batteries with their bit set in the mask.
+        """
+        battery_ids: set[int] = set()
+        while mask:
+            lowest = mask & -mask
+            battery_ids.add(self._bit_batteries[lowest.bit_length() - 1])
+            mask ^= lowest
+        return battery_ids
+
     def component_ids(self) -> collections.abc.Set[int]:
         """Return the set of component ids."""
         return self._battery_ids
@@ -184,25 +313,27 @@ class BatteryManager(ComponentManager):
         Returns:
             Result of the distribution.
         """
-        distribution_result = await self._get_distribution(request)
+        power_w = request.power.as_watts()
+        distribution_result = await self._get_distribution(request, power_w)
         if not isinstance(distribution_result, DistributionResult):
             return distribution_result
-        result = await self._distribute_power(request, distribution_result)
+        result = await self._distribute_power(request, distribution_result, power_w)
         return result
 
-    async def _get_distribution(self, request: Request) -> DistributionResult | Result:
+    async def _get_distribution(
+        self, request: Request, power_w: float
+    ) -> DistributionResult | Result:
         """Get the distribution of the batteries.
 
         Args:
             request: Request to get the distribution for.
+            power_w: The requested power, in watts.
 
         Returns:
             Distribution of the batteries.
         """
         try:
-            pairs_data: list[InvBatPair] = self._get_components_data(
-                request.component_ids
-            )
+            pairs_data, pair_bounds = self._get_components_data(request.component_ids)
         except KeyError as err:
             return Error(request=request, msg=str(err))
 
@@ -213,12 +344,12 @@ class BatteryManager(ComponentManager):
             )
             return Error(request=request, msg=str(error_msg))
 
-        error = self._check_request(request, pairs_data)
+        error = self._check_request(request, pair_bounds, power_w)
         if error:
             return error
 
         try:
-            distribution = self._get_power_distribution(request, pairs_data)
+            distribution = self._get_power_distribution(power_w, pairs_data)
         except ValueError as err:
             _logger.exception("Couldn't distribute power")
             error_msg = f"Couldn't distribute power, error: {str(err)}"
@@ -227,30 +358,29 @@ class BatteryManager(ComponentManager):
         return distribution
 
     async def _distribute_power(
-        self, request: Request, distribution: DistributionResult
+        self, request: Request, distribution: DistributionResult, power_w: float
     ) -> Result:
         """Set the distributed power to the batteries.
 
         Args:
             request: Request to set the power for.
             distribution: Distribution to set.
+            power_w: The requested power, in watts.
 
         Returns:
             Result from the microgrid API.
         """
-        distributed_power_value = (
-            request.power.as_watts() - distribution.remaining_power
+        distributed_power_value = power_w - distribution.remaining_power
+        battery_distribution: collections.defaultdict[int, float] = (
+            collections.defaultdict(float)
         )
-        battery_distribution: dict[int, float] = {}
         for inverter_id, dist in distribution.distribution.items():
             for battery_id in self._inv_bats_map[inverter_id]:
-                battery_distribution[battery_id] = (
-                    battery_distribution.get(battery_id, 0.0) + dist
-                )
+                battery_distribution[battery_id] += dist
         _logger.debug(
             "Distributing power %d between the batteries %s",
             distributed_power_value,
-            str(battery_distribution),
+            dict(battery_distribution),
         )
 
         failed_power, failed_batteries = await self._set_distributed_power(
@@ -258,8 +388,9 @@ class BatteryManager(ComponentManager):
         )
 
         response: Success | PartialFailure
-        if len(failed_batteries) > 0:
-            succeed_batteries = set(battery_distribution.keys()) - failed_batteries
+        succeed_batteries = set(battery_distribution)
+        if failed_batteries:
+            succeed_batteries -= failed_batteries
             response = PartialFailure(
                 request=request,
                 succeeded_power=Power.from_watts(
@@ -271,7 +402,6 @@ class BatteryManager(ComponentManager):
                 excess_power=Power.from_watts(distribution.remaining_power),
             )
         else:
-            succeed_batteries = set(battery_distribution.keys())
             response = Success(
                 request=request,
                 succeeded_power=Power.from_watts(distributed_power_value),
@@ -279,12 +409,8 @@ class BatteryManager(ComponentManager):
                 excess_power=Power.from_watts(distribution.remaining_power),
             )
 
-        await asyncio.gather(
-            *[
-                self._component_pool_status_tracker.update_status(
-                    succeed_batteries, failed_batteries
-                ),
-            ]
+        await self._component_pool_status_tracker.update_status(
+            succeed_batteries, failed_batteries
         )
 
         return response
@@ -292,75 +418,59 @@ class BatteryManager(ComponentManager):
     async def _create_channels(self) -> None:
         """Create channels to get data of components in microgrid."""
         api = connection_manager.get().api_client
-        for battery_id, inverter_ids in self._bat_invs_map.items():
-            bat_recv: Receiver[BatteryData] = await api.battery_data(battery_id)
-            self._battery_caches[battery_id] = LatestValueCache(bat_recv)
+        battery_ids = list(self._bat_invs_map)
+        inverter_ids = list(self._inv_bats_map)
+
+        bat_recvs: list[Receiver[BatteryData]]
+        inv_recvs: list[Receiver[InverterData]]
+        bat_recvs, inv_recvs = await asyncio.gather(
+            asyncio.gather(*(api.battery_data(bat_id) for bat_id in battery_ids)),
+            asyncio.gather(*(api.inverter_data(inv_id) for inv_id in inverter_ids)),
+        )
 
-            for inverter_id in inverter_ids:
-                inv_recv: Receiver[InverterData] = await api.inverter_data(inverter_id)
-                self._inverter_caches[inverter_id] = LatestValueCache(inv_recv)
+        for battery_id, bat_recv in zip(battery_ids, bat_recvs):
+            self._battery_caches[battery_id] = LatestValueCache(bat_recv)
+        for inverter_id, inv_recv in zip(inverter_ids, inv_recvs):
+            self._inverter_caches[inverter_id] = LatestValueCache(inv_recv)
 
-    def _get_bounds(
-        self,
-        pairs_data: list[InvBatPair],
-    ) -> PowerBounds:
+    def _get_bounds(self, pair_bounds: list[_PairBounds]) -> PowerBounds:
         """Get power bounds for given batteries.
 
         Args:
-            pairs_data: list of battery and adjacent inverter data pairs.
+            pair_bounds: the bounds of the battery and adjacent inverter data pairs.
 
         Returns:
             Power bounds for given batteries.
         """
         return PowerBounds(
             inclusion_lower=sum(
-                max(
-                    battery.power_bounds.inclusion_lower,
-                    sum(
-                        inverter.active_power_inclusion_lower_bound
-                        for inverter in inverters
-                    ),
-                )
-                for battery, inverters in pairs_data
+                max(bounds.bat_incl_lo, bounds.inv_incl_lo) for bounds in pair_bounds
             ),
             inclusion_upper=sum(
-                min(
-                    battery.power_bounds.inclusion_upper,
-                    sum(
-                        inverter.active_power_inclusion_upper_bound
-                        for inverter in inverters
-                    ),
-                )
-                for battery, inverters in pairs_data
+                min(bounds.bat_incl_hi, bounds.inv_incl_hi) for bounds in pair_bounds
             ),
             exclusion_lower=min(
-                sum(battery.power_bounds.exclusion_lower for battery, _ in pairs_data),
-                sum(
-                    inverter.active_power_exclusion_lower_bound
-                    for _, inverters in pairs_data
-                    for inverter in inverters
-                ),
+                sum(bounds.bat_excl_lo for bounds in pair_bounds),
+                sum(bounds.inv_excl_lo for bounds in pair_bounds),
             ),
             exclusion_upper=max(
-                sum(battery.power_bounds.exclusion_upper for battery, _ in pairs_data),
-                sum(
-                    inverter.active_power_exclusion_upper_bound
-                    for _, inverters in pairs_data
-                    for inverter in inverters
-                ),
+                sum(bounds.bat_excl_hi for bounds in pair_bounds),
+                sum(bounds.inv_excl_hi for bounds in pair_bounds),
             ),
         )
 
     def _check_request(
         self,
         request: Request,
-        pairs_data: list[InvBatPair],
+        pair_bounds: list[_PairBounds],
+        power_w: float,
     ) -> Result | None:
         """Check whether the given request if correct.
 
         Args:
             request: request to check
-            pairs_data: list of battery and adjacent inverter data pairs.
+            pair_bounds: the bounds of the battery and adjacent inverter data pairs.
+            power_w: the requested power, in watts.
 
         Returns:
             Result for the user if the request is wrong, None otherwise.
@@ -368,22 +478,18 @@ class BatteryManager(ComponentManager):
         if not request.component_ids:
             return Error(request=request, msg="Empty battery IDs in the request")
 
-        for battery in request.component_ids:
-            _logger.debug("Checking battery %d", battery)
-            if battery not in self._battery_caches:
-                msg = (
-                    f"No battery {battery}, available batteries: "
-                    f"{list(self._battery_caches.keys())}"
-                )
-                return Error(request=request, msg=msg)
-
-        bounds = self._get_bounds(pairs_data)
+        if missing := request.component_ids - self._battery_caches.keys():
+            msg = (
+                f"No battery {next(iter(missing))}, available batteries: "
+                f"{list(self._battery_caches.keys())}"
+            )
+            return Error(request=request, msg=msg)
 
-        power = request.power.as_watts()
+        bounds = self._get_bounds(pair_bounds)
 
         # Zero power requests are always forwarded to the microgrid API, even if they
         # are outside the exclusion bounds.
-        if is_close_to_zero(power):
+        if is_close_to_zero(power_w):
             return None
 
         if request.adjust_power:
@@ -392,19 +498,19 @@ class BatteryManager(ComponentManager):
             #
             # If the requested power is in the exclusion bounds, it is NOT possible to
             # increase it so that it is outside the exclusion bounds.
-            if bounds.exclusion_lower < power < bounds.exclusion_upper:
+            if bounds.exclusion_lower < power_w < bounds.exclusion_upper:
                 return OutOfBounds(request=request, bounds=bounds)
         else:
-            in_lower_range = bounds.inclusion_lower <= power <= bounds.exclusion_lower
-            in_upper_range = bounds.exclusion_upper <= power <= bounds.inclusion_upper
+            in_lower_range = bounds.inclusion_lower <= power_w <= bounds.exclusion_lower
+            in_upper_range = bounds.exclusion_upper <= power_w <= bounds.inclusion_upper
             if not (in_lower_range or in_upper_range):
                 return OutOfBounds(request=request, bounds=bounds)
 
         return None
 
     def _get_battery_inverter_data(
-        self, battery_ids: frozenset[int], inverter_ids: frozenset[int]
-    ) -> InvBatPair | None:
+        self, battery_ids: tuple[int, ...], inverter_ids: tuple[int, ...]
+    ) -> tuple[InvBatPair, _PairBounds] | None:
         """Get battery and inverter data if they are correct.
 
         Each float data from the microgrid can be "NaN".
@@ -416,8 +522,9 @@ class BatteryManager(ComponentManager):
             inverter_ids: inverter ids
 
         Returns:
-            Data for the battery and adjacent inverter without NaN values.
-                Return None if we could not replace NaN values.
+            Data for the battery and adjacent inverter without NaN values, and the
+                power bounds of the pair, summed while checking the data. Return
+                None if we could not replace NaN values.
         """
         # It means that nothing has been send on these channels, yet.
         # This should be handled by BatteryStatus. BatteryStatus should not return
@@ -441,46 +548,42 @@ class BatteryManager(ComponentManager):
             self._inverter_caches[inverter_id].get() for inverter_id in inverter_ids
         ]
 
-        DataType = typing.TypeVar("DataType", BatteryData, InverterData)
-
-        def metric_is_nan(data: DataType, metrics: list[str]) -> bool:
-            """Check if non-replaceable metrics are NaN."""
-            assert data is not None
-            return any(map(lambda metric: math.isnan(getattr(data, metric)), metrics))
-
-        def nan_metric_in_list(data: list[DataType], metrics: list[str]) -> bool:
-            """Check if any metric is NaN."""
-            return any(map(lambda datum: metric_is_nan(datum, metrics), data))
-
-        crucial_metrics_bat = [
-            "soc",
-            "soc_lower_bound",
-            "soc_upper_bound",
-            "capacity",
-            "power_inclusion_lower_bound",
-            "power_inclusion_upper_bound",
-        ]
-
-        crucial_metrics_inv = [
-            "active_power_inclusion_lower_bound",
-            "active_power_inclusion_upper_bound",
-        ]
-
-        if nan_metric_in_list(battery_data, crucial_metrics_bat):
-            _logger.debug("Some metrics for battery set %s are NaN", list(battery_ids))
-            return None
+        # A single pass over the data, using `value != value` as NaN check, as NaN
+        # is the only value that is not equal to itself.
+        for battery in battery_data:
+            metrics = _get_crucial_battery_metrics(battery)
+            # pylint: disable-next=comparison-with-itself
+            if any(metric != metric for metric in metrics):
+                if _logger.isEnabledFor(logging.DEBUG):
+                    _logger.debug(
+                        "Some metrics for battery set %s are NaN", list(battery_ids)
+                    )
+                return None
 
-        if nan_metric_in_list(inverter_data, crucial_metrics_inv):
-            _logger.debug(
-                "Some metrics for inverter set %s are NaN", list(inverter_ids)
-            )
+        inverter_bounds = _sum_inverter_bounds(inverter_data)
+        if inverter_bounds is None:
+            if _logger.isEnabledFor(logging.DEBUG):
+                _logger.debug(
+                    "Some metrics for inverter set %s are NaN", list(inverter_ids)
+                )
             return None
 
-        return InvBatPair(AggregatedBatteryData(battery_data), inverter_data)
+        aggregated_battery = AggregatedBatteryData(battery_data)
+        bat_bounds = aggregated_battery.power_bounds
+        return (
+            InvBatPair(aggregated_battery, inverter_data),
+            _PairBounds(
+                bat_bounds.inclusion_lower,
+                bat_bounds.inclusion_upper,
+                bat_bounds.exclusion_lower,
+                bat_bounds.exclusion_upper,
+                *inverter_bounds,
+            ),
+        )
 
     def _get_components_data(
         self, batteries: collections.abc.Set[int]
-    ) -> list[InvBatPair]:
+    ) -> tuple[list[InvBatPair], list[_PairBounds]]:
         """Get data for the given batteries and adjacent inverters.
 
         Args:
@@ -490,9 +593,10 @@ class BatteryManager(ComponentManager):
             KeyError: If any battery in the given list doesn't exists in microgrid.
 
         Returns:
-            Pairs of battery and adjacent inverter data.
+            Pairs of battery and adjacent inverter data, and their bounds.
         """
         pairs_data: list[InvBatPair] = []
+        pair_bounds: list[_PairBounds] = []
 
         working_batteries = self._component_pool_status_tracker.get_working_components(
             batteries
@@ -505,68 +609,58 @@ class BatteryManager(ComponentManager):
                     f"available batteries: {list(self._battery_caches.keys())}"
                 )
 
-        connected_inverters = _get_all_from_map(self._bat_invs_map, batteries)
-
         # Check to see if inverters are involved that are connected to batteries
         # that were not requested.
-        batteries_from_inverters = _get_all_from_map(
-            self._inv_bats_map, connected_inverters
-        )
-
-        if batteries_from_inverters != batteries:
-            extra_batteries = batteries_from_inverters - batteries
+        requested_mask = 0
+        batteries_from_inverters_mask = 0
+        for battery_id in batteries:
+            requested_mask |= self._battery_bits[battery_id]
+            batteries_from_inverters_mask |= self._bat_inv_bats_mask[battery_id]
+
+        if batteries_from_inverters_mask != requested_mask:
+            extra_batteries = self._mask_to_ids(
+                batteries_from_inverters_mask & ~requested_mask
+            )
             raise KeyError(
                 f"Inverters {_get_all_from_map(self._bat_invs_map, extra_batteries)} "
                 f"are connected to batteries that were not requested: {extra_batteries}"
             )
 
         # set of set of batteries one for each working_battery
-        battery_sets: frozenset[frozenset[int]] = frozenset(
+        battery_sets: frozenset[tuple[int, ...]] = frozenset(
             self._bat_bats_map[working_battery] for working_battery in working_batteries
         )
 
         for battery_ids in battery_sets:
-            inverter_ids: frozenset[int] = self._bat_invs_map[next(iter(battery_ids))]
+            inverter_ids: tuple[int, ...] = self._bat_invs_map[next(iter(battery_ids))]
 
-            data = self._get_battery_inverter_data(battery_ids, inverter_ids)
-            if data is None:
+            result = self._get_battery_inverter_data(battery_ids, inverter_ids)
+            if result is None:
                 _logger.warning(
                     "Skipping battery set %s because at least one of its messages isn't correct.",
-                    list(battery_ids),
+                    battery_ids,
                 )
                 continue
 
+            data, bounds = result
             assert len(data.inverter) > 0
             pairs_data.append(data)
-        return pairs_data
+            pair_bounds.append(bounds)
+        return pairs_data, pair_bounds
 
     def _get_power_distribution(
-        self, request: Request, inv_bat_pairs: list[InvBatPair]
+        self, power_w: float, inv_bat_pairs: list[InvBatPair]
     ) -> DistributionResult:
         """Get power distribution result for the batteries in the request.
 
         Args:
-            request: the power request to process.
+            power_w: the requested power, in watts.
             inv_bat_pairs: the battery and adjacent inverter data pairs.
 
         Returns:
             the power distribution result.
         """
-        available_bat_ids = _get_all_from_map(
-            self._bat_bats_map, {pair.battery.component_id for pair in inv_bat_pairs}
-        )
-
-        unavailable_bat_ids = request.component_ids - available_bat_ids
-        unavailable_inv_ids: set[int] = set()
-
-        for inverter_ids in [
-            self._bat_invs_map[battery_id_set] for battery_id_set in unavailable_bat_ids
-        ]:
-            unavailable_inv_ids = unavailable_inv_ids.union(inverter_ids)
-
-        result = self._distribution_algorithm.distribute_power(
-            request.power.as_watts(), inv_bat_pairs
-        )
+        result = self._distribution_algorithm.distribute_power(power_w, inv_bat_pairs)
 
         return result
 
@@ -586,36 +680,38 @@ class BatteryManager(ComponentManager):
             set of batteries that failed.
         """
         api = microgrid.connection_manager.get().api_client
+        timeout_s = timeout.total_seconds()
 
-        tasks = {
-            inverter_id: asyncio.create_task(api.set_power(inverter_id, power))
-            for inverter_id, power in distribution.distribution.items()
-        }
+        async def _with_timeout(request: collections.abc.Awaitable[typing.Any]) -> None:
+            async with asyncio.timeout(timeout_s):
+                await request
 
-        _, pending = await asyncio.wait(
-            tasks.values(),
-            timeout=timeout.total_seconds(),
-            return_when=asyncio.ALL_COMPLETED,
+        results = await asyncio.gather(
+            *(
+                _with_timeout(api.set_power(inverter_id, power))
+                for inverter_id, power in distribution.distribution.items()
+            ),
+            return_exceptions=True,
         )
 
-        await self._cancel_tasks(pending)
-
-        return self._parse_result(tasks, distribution.distribution, timeout)
+        return self._parse_result(results, distribution.distribution, timeout)
 
     def _parse_result(
         self,
-        tasks: dict[int, asyncio.Task[None]],
+        results: list[BaseException | None],
         distribution: dict[int, float],
         request_timeout: timedelta,
     ) -> tuple[float, set[int]]:
         """Parse the results of `set_power` requests.
 
-        Check if any task has failed and determine the reason for failure.
-        If any task did not succeed, then the corresponding battery is marked as broken.
+        Check if any request has failed and determine the reason for failure.
+        If any request did not succeed, then the corresponding battery is marked as
+        broken.
 
         Args:
-            tasks: A dictionary where the key is the inverter ID and the value is the task that
-                set the power for this inverter. Each task should be finished or cancelled.
+            results: The result of the `set_power` request for each inverter, in
+                the same order as in `distribution`. `None` means the request
+                succeeded, otherwise it is the exception the request failed with.
             distribution: A dictionary where the key is the inverter ID and the value is how much
                 power was set to the corresponding inverter.
             request_timeout: The timeout that was used for the request.
@@ -623,49 +719,42 @@ class BatteryManager(ComponentManager):
         Returns:
             A tuple where the first element is the total failed power, and the second element is
             the set of batteries that failed.
+
+        Raises:
+            BaseException: If any request failed with an unexpected exception, it
+                is re-raised.
         """
         failed_power: float = 0.0
         failed_batteries: set[int] = set()
 
-        for inverter_id, aws in tasks.items():
+        for inverter_id, result in zip(distribution, results):
+            if result is None:
+                continue
             battery_ids = self._inv_bats_map[inverter_id]
-            try:
-                aws.result()
-            except grpc.aio.AioRpcError as err:
+            if isinstance(result, grpc.aio.AioRpcError):
                 failed_power += distribution[inverter_id]
-                failed_batteries = failed_batteries.union(battery_ids)
-                if err.code() == grpc.StatusCode.OUT_OF_RANGE:
+                failed_batteries.update(battery_ids)
+                if result.code() == grpc.StatusCode.OUT_OF_RANGE:
                     _logger.debug(
                         "Set power for battery %s failed, error %s",
                         battery_ids,
-                        str(err),
+                        result,
                     )
                 else:
                     _logger.warning(
                         "Set power for battery %s failed, error %s. Mark it as broken.",
                         battery_ids,
-                        str(err),
+                        result,
                     )
-            except asyncio.exceptions.CancelledError:
+            elif isinstance(result, TimeoutError):
                 failed_power += distribution[inverter_id]
-                failed_batteries = failed_batteries.union(battery_ids)
+                failed_batteries.update(battery_ids)
                 _logger.warning(
                     "Battery %s didn't respond in %f sec. Mark it as broken.",
                     battery_ids,
                     request_timeout.total_seconds(),
                 )
+            else:
+                raise result
 
         return failed_power, failed_batteries
-
-    async def _cancel_tasks(
-        self, tasks: collections.abc.Iterable[asyncio.Task[typing.Any]]
-    ) -> None:
-        """Cancel given asyncio tasks and wait for them.
-
-        Args:
-            tasks: tasks to cancel.
-        """
-        for aws in tasks:
-            aws.cancel()
-
-        await asyncio.gather(*tasks, return_exceptions=True)
@@ -149,7 +149,7 @@ class Bounds(Generic[_T]):
     """Upper bound."""
 
 
-@dataclass(frozen=True, kw_only=True)
+@dataclass(frozen=True, kw_only=True, slots=True)
 class SystemBounds:
     """Internal representation of system bounds for groups of components."""
 
@@ -11,14 +11,11 @@ import logging
 import math
 from bisect import bisect
 from collections import deque
-from collections.abc import AsyncIterator, Callable, Coroutine, Sequence
+from collections.abc import AsyncIterator, Callable, Coroutine, Iterable, Sequence
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
 from typing import cast
 
-from frequenz.channels.util import Timer
-from frequenz.channels.util._timer import _to_microseconds
-
 from .._internal._asyncio import cancel_and_await
 from ._base_types import UNIX_EPOCH, Sample
 from ._quantities import Quantity, QuantityT
@@ -111,7 +108,8 @@ def average(
     """Calculate average of all the provided values.
 
     Args:
-        samples: The samples to apply the average to. It must be non-empty.
+        samples: The samples to apply the average to. At least one of them must
+            have a value.
         resampler_config: The configuration of the resampler calling this
             function.
         source_properties: The properties of the source being resampled.
@@ -119,14 +117,18 @@ def average(
     Returns:
         The average of all `samples` values.
     """
-    assert len(samples) > 0, "Average cannot be given an empty list of samples"
-    values = list(
-        sample.value.base_value for sample in samples if sample.value is not None
-    )
-    return sum(values) / len(values)
-
-
-@dataclass(frozen=True)
+    total = 0.0
+    count = 0
+    for sample in samples:
+        value = sample.value
+        if value is not None:
+            total += value.base_value
+            count += 1
+    assert count > 0, "Average cannot be given samples without values"
+    return total / count
+
+
+@dataclass(frozen=True, slots=True)
 class ResamplerConfig:
     """Resampler configuration."""
 
@@ -321,7 +323,7 @@ class ResamplingError(RuntimeError):
         return f"{self.__class__.__name__}({self.exceptions=})"
 
 
-@dataclass
+@dataclass(slots=True)
 class SourceProperties:
     """Properties of a resampling source."""
 
@@ -344,6 +346,24 @@ class SourceProperties:
     """
 
 
+_ERROR_TYPES = (Exception, asyncio.CancelledError)
+"""The errors found while resampling that are reported in a `ResamplingError`.
+
+`CancelledError` inherits from `BaseException`, but we don't want to catch *all*
+`BaseException`s.
+"""
+
+
+def _is_cancelling() -> bool:
+    """Check if the current task is being cancelled.
+
+    Returns:
+        Whether there is a current task and a cancellation was requested for it.
+    """
+    task = asyncio.current_task()
+    return task is not None and task.cancelling() > 0
+
+
 class Resampler:
     """A timeseries resampler.
 
@@ -371,6 +391,12 @@ class Resampler:
         self._resamplers: dict[Source, _StreamingHelper] = {}
         """A mapping between sources and the streaming helper handling that source."""
 
+        self._helpers: tuple[_StreamingHelper, ...] = ()
+        """The streaming helpers, in the same order as in `_resamplers`.
+
+        Kept so the helpers don't need to be collected on every resampling.
+        """
+
         window_end, start_delay_time = self._calculate_window_end()
         self._window_end: datetime = window_end
         """The time in which the current window ends.
@@ -385,15 +411,15 @@ class Resampler:
         the window end is deterministic.
         """
 
-        self._timer: Timer = Timer.periodic(config.resampling_period)
-        """The timer used to trigger the resampling windows."""
+        self._next_deadline: float = (
+            asyncio.get_running_loop().time()
+            + (config.resampling_period + start_delay_time).total_seconds()
+        )
+        """The event loop time in which the current window ends.
 
-        # Hack to align the timer, this should be implemented in the Timer class
-        self._timer._next_tick_time = _to_microseconds(
-            timedelta(seconds=asyncio.get_running_loop().time())
-            + config.resampling_period
-            + start_delay_time
-        )  # pylint: disable=protected-access
+        The loop time is monotonic, so waiting for it is not affected by wall
+        clock adjustments, and it is aligned like `_window_end`.
+        """
 
     @property
     def config(self) -> ResamplerConfig:
@@ -439,6 +465,7 @@ class Resampler:
             _ResamplingHelper(name, self._config), source, sink
         )
         self._resamplers[source] = resampler
+        self._helpers = tuple(self._resamplers.values())
         return True
 
     def remove_timeseries(self, source: Source) -> bool:
@@ -456,6 +483,7 @@ class Resampler:
             del self._resamplers[source]
         except KeyError:
             return False
+        self._helpers = tuple(self._resamplers.values())
         return True
 
     async def resample(self, *, one_shot: bool = False) -> None:
@@ -476,50 +504,122 @@ class Resampler:
                 timeseries from the resampler before calling this method
                 again).
         """
+        period = self._config.resampling_period
         # We use a tolerance of 10% of the resampling period
-        tolerance = timedelta(
-            seconds=self._config.resampling_period.total_seconds() / 10.0
-        )
+        tolerance_s = period.total_seconds() / 10.0
 
-        async for drift in self._timer:
-            now = datetime.now(tz=timezone.utc)
+        while True:
+            drift_s = await self._wait_for_next_resampling_period()
 
-            if drift > tolerance:
+            # Lateness is measured in loop time, so the wall clock is only
+            # needed when there is something to report.
+            if drift_s > tolerance_s and _logger.isEnabledFor(logging.WARNING):
                 _logger.warning(
                     "The resampling task woke up too late. Resampling should have "
                     "started at %s, but it started at %s (tolerance: %s, "
                     "difference: %s; resampling period: %s)",
                     self._window_end,
-                    now,
-                    tolerance,
-                    drift,
-                    self._config.resampling_period,
+                    datetime.now(tz=timezone.utc),
+                    timedelta(seconds=tolerance_s),
+                    timedelta(seconds=drift_s),
+                    period,
                 )
 
-            results = await asyncio.gather(
-                *[r.resample(self._window_end) for r in self._resamplers.values()],
-                return_exceptions=True,
-            )
-
-            self._window_end += self._config.resampling_period
-            # We need the cast because mypy is not able to infer that this can only
-            # contain Exception | CancelledError because of the condition in the list
-            # comprehension below.
-            exceptions = cast(
-                dict[Source, Exception | asyncio.CancelledError],
-                {
-                    source: results[i]
-                    for i, source in enumerate(self._resamplers)
-                    # CancelledError inherits from BaseException, but we don't want
-                    # to catch *all* BaseExceptions here.
-                    if isinstance(results[i], (Exception, asyncio.CancelledError))
-                },
-            )
-            if exceptions:
-                raise ResamplingError(exceptions)
+            results = await self._resample_helpers()
+
+            self._window_end += period
+            # Errors are rare, so only look for the failing sources if needed.
+            if any(isinstance(result, _ERROR_TYPES) for result in results):
+                # We need the cast because mypy is not able to infer that this can
+                # only contain Exception | CancelledError because of the condition
+                # in the dict comprehension below.
+                raise ResamplingError(
+                    cast(
+                        dict[Source, Exception | asyncio.CancelledError],
+                        {
+                            source: result
+                            for source, result in zip(self._resamplers, results)
+                            if isinstance(result, _ERROR_TYPES)
+                        },
+                    )
+                )
             if one_shot:
                 break
 
+    async def _wait_for_next_resampling_period(self) -> float:
+        """Wait until the end of the current resampling window.
+
+        If the window end already passed, it returns immediately, so missed
+        windows are resampled right away, one after the other.
+
+        Returns:
+            How late (in seconds) the resampling window end was reached.
+        """
+        loop = asyncio.get_running_loop()
+        deadline = self._next_deadline
+        delay = deadline - loop.time()
+        if delay > 0:
+            await asyncio.sleep(delay)
+        # The next deadline is based on the previous one (not on the current
+        # time), so delays don't accumulate.
+        self._next_deadline = deadline + self._config.resampling_period.total_seconds()
+        return max(0.0, loop.time() - deadline)
+
+    async def _resample_helpers(self) -> Sequence[BaseException | None]:
+        """Resample all timeseries for the current window.
+
+        Returns:
+            The result of resampling each timeseries, in the same order as in
+                `_resamplers`: `None` if it succeeded or the exception raised.
+
+        Raises:
+            asyncio.CancelledError: If this task is cancelled while resampling.
+        """
+        helpers = self._helpers
+        window_end = self._window_end
+        results: list[BaseException | None] = [None] * len(helpers)
+
+        # All the samples are calculated first, in one go, and only then they
+        # are sent, so only the sending needs to be awaited.
+        indexes: list[int] = []
+        sends: list[Coroutine[None, None, None]] = []
+        for index, helper in enumerate(helpers):
+            try:
+                send = helper.send(helper.compute_sample(window_end))
+            except asyncio.CancelledError as exc:
+                # The receiving task of the helper was cancelled, which is
+                # a resampling error, unless this task is being cancelled too.
+                if _is_cancelling():
+                    raise
+                results[index] = exc
+                continue
+            except Exception as exc:  # pylint: disable=broad-except
+                results[index] = exc
+                continue
+            indexes.append(index)
+            sends.append(send)
+
+        if len(sends) == 1:
+            # Resampling a single timeseries is very common, and it doesn't
+            # need a gather (and its future) at all.
+            try:
+                await sends[0]
+            except asyncio.CancelledError as exc:
+                # Only a cancellation coming from the sink is a resampling
+                # error, if this task is being cancelled we should stop.
+                if _is_cancelling():
+                    raise
+                results[indexes[0]] = exc
+            except Exception as exc:  # pylint: disable=broad-except
+                results[indexes[0]] = exc
+        elif sends:
+            for index, result in zip(
+                indexes, await asyncio.gather(*sends, return_exceptions=True)
+            ):
+                results[index] = result
+
+        return results
+
     def _calculate_window_end(self) -> tuple[datetime, timedelta]:
         """Calculate the end of the current resampling window.
 
@@ -535,7 +635,7 @@ class Resampler:
         Returns:
             A tuple with the end of the current resampling window aligned to
                 `self._config.align_to` as the first item and the time we need to
-                delay the timer start to make sure it is also aligned.
+                delay the first resampling to make sure it is also aligned.
         """
         now = datetime.now(timezone.utc)
         period = self._config.resampling_period
@@ -578,8 +678,30 @@ class _ResamplingHelper:
         """
         self._name = name
         self._config = config
+        assert (
+            config.initial_buffer_len > 0
+        ), "We need a buffer length of at least 1 to update the sample period"
         self._buffer: deque[Sample[Quantity]] = deque(maxlen=config.initial_buffer_len)
         self._source_properties: SourceProperties = SourceProperties()
+        self._sampling_start_s: float | None = None
+        """The source properties `sampling_start`, as POSIX seconds."""
+        self._max_age: timedelta = (
+            config.resampling_period * config.max_data_age_in_periods
+        )
+        """The maximum age of the relevant samples.
+
+        It is updated when the input sampling period is calculated.
+        """
+        self._min_samples_for_period: float = (
+            config.resampling_period.total_seconds() * config.max_data_age_in_periods
+        )
+        """The samples that need to be received to calculate the sampling period."""
+        self._fast_average: bool = config.resampling_function is average
+        """Whether the default `average` resampling function is used.
+
+        `average()` doesn't keep references to the samples, so it can get the
+        buffer itself instead of a copy of the relevant samples.
+        """
 
     @property
     def source_properties(self) -> SourceProperties:
@@ -599,6 +721,7 @@ class _ResamplingHelper:
         self._buffer.append(sample)
         if self._source_properties.sampling_start is None:
             self._source_properties.sampling_start = sample.timestamp
+            self._sampling_start_s = sample.timestamp.timestamp()
         self._source_properties.received_samples += 1
 
     def _update_source_sample_period(self, now: datetime) -> bool:
@@ -610,36 +733,43 @@ class _ResamplingHelper:
         Returns:
             Whether the source sample period was changed (was really updated).
         """
-        assert (
-            self._buffer.maxlen is not None and self._buffer.maxlen > 0
-        ), "We need a maxlen of at least 1 to update the sample period"
+        props = self._source_properties
+        # This is called on every resampling, but it only does something until
+        # the sampling period is known.
+        if props.sampling_period is not None:
+            return False
 
         config = self._config
-        props = self._source_properties
 
-        # We only update it if we didn't before and we have enough data
+        # We only update it if we have enough data
+        sampling_start_s = self._sampling_start_s
+        now_s = now.timestamp()
         if (
-            props.sampling_period is not None
-            or props.sampling_start is None
-            or props.received_samples
-            < config.resampling_period.total_seconds() * config.max_data_age_in_periods
-            or len(self._buffer) < self._buffer.maxlen
+            sampling_start_s is None
+            or props.received_samples < self._min_samples_for_period
+            or len(self._buffer) < cast(int, self._buffer.maxlen)
             # There might be a race between the first sample being received and
             # this function being called
-            or now <= props.sampling_start
+            or now_s <= sampling_start_s
         ):
             return False
 
-        samples_time_delta = now - props.sampling_start
         props.sampling_period = timedelta(
-            seconds=samples_time_delta.total_seconds() / props.received_samples
+            seconds=(now_s - sampling_start_s) / props.received_samples
         )
-
-        _logger.debug(
-            "New input sampling period calculated for %r: %ss",
-            self._name,
-            props.sampling_period,
+        # To see which samples are relevant we need to consider if we are down
+        # or upsampling.
+        self._max_age = (
+            max(config.resampling_period, props.sampling_period)
+            * config.max_data_age_in_periods
         )
+
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "New input sampling period calculated for %r: %ss",
+                self._name,
+                props.sampling_period,
+            )
         return True
 
     def _update_buffer_len(self) -> bool:
@@ -649,7 +779,6 @@ class _ResamplingHelper:
             Whether the buffer length was changed (was really updated).
         """
         # To make type checking happy
-        assert self._buffer.maxlen is not None
         assert self._source_properties.sampling_period is not None
 
         input_sampling_period = self._source_properties.sampling_period
@@ -693,13 +822,22 @@ class _ResamplingHelper:
         if new_buffer_len == self._buffer.maxlen:
             return False
 
-        _logger.debug(
-            "New buffer length calculated for %r: %s",
-            self._name,
-            new_buffer_len,
-        )
+        if _logger.isEnabledFor(logging.DEBUG):
+            _logger.debug(
+                "New buffer length calculated for %r: %s",
+                self._name,
+                new_buffer_len,
+            )
 
-        self._buffer = deque(self._buffer, maxlen=new_buffer_len)
+        # A deque's maxlen can't be changed, so a new one is always needed, but
+        # when shrinking, the oldest samples that would be dropped anyway are
+        # not copied.
+        samples: Iterable[Sample[Quantity]] = self._buffer
+        if new_buffer_len < len(self._buffer):
+            samples = itertools.islice(
+                self._buffer, len(self._buffer) - new_buffer_len, None
+            )
+        self._buffer = deque(samples, maxlen=new_buffer_len)
 
         return True
 
@@ -715,43 +853,49 @@ class _ResamplingHelper:
                 If there are no *relevant* samples, then the new sample will
                 have `None` as `value`.
         """
-        if self._update_source_sample_period(timestamp):
-            self._update_buffer_len()
-
         conf = self._config
         props = self._source_properties
 
-        # To see which samples are relevant we need to consider if we are down
-        # or upsampling.
-        period = (
-            max(
-                conf.resampling_period,
-                props.sampling_period,
-            )
-            if props.sampling_period is not None
-            else conf.resampling_period
-        )
-        minimum_relevant_timestamp = timestamp - period * conf.max_data_age_in_periods
+        if self._update_source_sample_period(timestamp):
+            self._update_buffer_len()
 
-        min_index = bisect(
-            self._buffer,
-            minimum_relevant_timestamp,
-            key=lambda s: s.timestamp,
-        )
-        max_index = bisect(self._buffer, timestamp, key=lambda s: s.timestamp)
-        # Using itertools for slicing doesn't look very efficient, but
-        # experiments with a custom (ring) buffer that can slice showed that
-        # it is not that bad. See:
-        # https://github.com/frequenz-floss/frequenz-sdk-python/pull/130
-        # So if we need more performance beyond this point, we probably need to
-        # resort to some C (or similar) implementation.
-        relevant_samples = list(itertools.islice(self._buffer, min_index, max_index))
-        value = (
-            conf.resampling_function(relevant_samples, conf, props)
-            if relevant_samples
-            else None
-        )
-        return Sample(timestamp, None if value is None else Quantity(value))
+        buffer = self._buffer
+        min_index = bisect(buffer, timestamp - self._max_age, key=lambda s: s.timestamp)
+        if min_index and props.sampling_period is not None:
+            # Once the input sampling period is known the period can't change
+            # anymore, so the window only moves forward and samples that are
+            # not relevant now will never be relevant again: drop them. While
+            # warming up, the samples are still needed to fill the buffer.
+            for _ in range(min_index):
+                buffer.popleft()
+            min_index = 0
+        # Samples from the future are not relevant either, but usually there
+        # are none, so we can avoid bisecting.
+        if buffer and buffer[-1].timestamp <= timestamp:
+            max_index = len(buffer)
+        else:
+            max_index = bisect(buffer, timestamp, key=lambda s: s.timestamp)
+
+        if min_index == max_index:
+            return Sample(timestamp, None)
+
+        if self._fast_average:
+            # When all the buffer is relevant, which is the usual case once old
+            # samples are discarded, it can be averaged without copying it.
+            value = average(
+                (
+                    buffer
+                    if min_index == 0 and max_index == len(buffer)
+                    else list(itertools.islice(buffer, min_index, max_index))
+                ),
+                conf,
+                props,
+            )
+        else:
+            value = conf.resampling_function(
+                list(itertools.islice(buffer, min_index, max_index)), conf, props
+            )
+        return Sample(timestamp, Quantity(value))
 
 
 class _StreamingHelper:
@@ -796,31 +940,39 @@ class _StreamingHelper:
         This method keeps running until the source stops (or fails with an
         error).
         """
+        # Sources are plain async iterators (and the channels receivers have no
+        # way to receive several messages at once), so samples can only be
+        # received one by one, but we can at least avoid the attribute lookups.
+        add_sample = self._helper.add_sample
         async for sample in self._source:
-            if sample.value is not None and not sample.value.isnan():
-                self._helper.add_sample(sample)
+            value = sample.value
+            if value is None:
+                continue
+            base_value = value.base_value
+            # NaN is the only value that is not equal to itself, this is cheaper
+            # than calling isnan().
+            if base_value == base_value:  # pylint: disable=comparison-with-itself
+                add_sample(sample)
 
-    async def resample(self, timestamp: datetime) -> None:
-        """Calculate a new sample for the passed `timestamp` and send it.
+    def compute_sample(self, timestamp: datetime) -> Sample[Quantity]:
+        """Calculate a new sample for the passed `timestamp`.
 
-        The helper is used to calculate the new sample and the sender is used
-        to send it.
+        The helper is used to calculate the new sample.
 
         Args:
             timestamp: The timestamp to be used to calculate the new sample.
 
+        Returns:
+            The new sample, to be sent using `send()`.
+
         Raises:
             SourceStoppedError: If the source stopped sending samples.
-            Exception: if there was any error while receiving from the source
-                or sending to the sink.
-
-                If the error was in the source, then this helper will stop
-                working, as the internal task to receive samples will stop due
-                to the exception. Any subsequent call to `resample()` will keep
-                raising the same exception.
+            Exception: if there was any error while receiving from the source.
 
-                If the error is in the sink, the receiving part will continue
-                working while this helper is alive.
+                In this case this helper will stop working, as the internal
+                task to receive samples will stop due to the exception. Any
+                subsequent call to `compute_sample()` will keep raising the
+                same exception.
 
         [//]: # (# noqa: DAR401 recv_exception)
         """
@@ -829,4 +981,18 @@ class _StreamingHelper:
                 raise recv_exception
             raise SourceStoppedError(self._source)
 
-        await self._sink(self._helper.resample(timestamp))
+        return self._helper.resample(timestamp)
+
+    def send(self, sample: Sample[Quantity]) -> Coroutine[None, None, None]:
+        """Send a resampled sample to the sink.
+
+        If sending fails, the receiving part will continue working while this
+        helper is alive.
+
+        Args:
+            sample: The sample to send.
+
+        Returns:
+            The awaitable sending the sample.
+        """
+        return self._sink(sample)
@@ -4,6 +4,7 @@
 """Ringbuffer implementation with focus on time & memory efficiency."""
 
 
+from bisect import bisect_right
 from copy import deepcopy
 from dataclasses import dataclass
 from datetime import datetime, timedelta, timezone
@@ -43,6 +44,18 @@ class Gap:
         return False
 
 
+def _gap_start(gap: Gap) -> datetime:
+    """Get the start of a gap, used as sort key for the list of gaps.
+
+    Args:
+        gap: The gap to get the start of.
+
+    Returns:
+        The start timestamp of the gap.
+    """
+    return gap.start
+
+
 class OrderedRingBuffer(Generic[FloatArray]):
     """Time aware ringbuffer that keeps its entries sorted by time."""
 
@@ -250,11 +263,11 @@ class OrderedRingBuffer(Generic[FloatArray]):
                 f"outside the range [{self._timestamp_oldest} - {self._timestamp_newest}]"
             )
 
+        # The timestamp is normalized, so it is an exact multiple of the
+        # sampling period away from the alignment and integer division on the
+        # timedeltas gives the position without going through floats.
         return self.wrap(
-            round(
-                (timestamp - self._time_index_alignment).total_seconds()
-                / self._sampling_period.total_seconds()
-            )
+            (timestamp - self._time_index_alignment) // self._sampling_period
         )
 
     def get_timestamp(self, index: int) -> datetime | None:
@@ -460,7 +473,25 @@ class OrderedRingBuffer(Generic[FloatArray]):
         Returns:
             True if the given timestamp falls within a gap, False otherwise.
         """
-        return any(map(lambda gap: gap.contains(timestamp), self._gaps))
+        return self._find_gap(timestamp) is not None
+
+    def _find_gap(self, timestamp: datetime) -> int | None:
+        """Find the gap containing the given timestamp.
+
+        The gaps are kept sorted by their start and don't overlap, so only the
+        last gap starting at or before the timestamp can contain it.
+
+        Args:
+            timestamp: The timestamp to look for.
+
+        Returns:
+            The index of the gap containing the timestamp, or `None` if the
+                timestamp is not in a gap.
+        """
+        index = bisect_right(self._gaps, timestamp, key=_gap_start) - 1
+        if index >= 0 and self._gaps[index].contains(timestamp):
+            return index
+        return None
 
     def _update_gaps(
         self, timestamp: datetime, newest: datetime, record_as_missing: bool
@@ -507,7 +538,7 @@ class OrderedRingBuffer(Generic[FloatArray]):
         * remove overlaps
         * delete outdated gaps
         """
-        self._gaps = sorted(self._gaps, key=lambda x: x.start.timestamp())
+        self._gaps.sort(key=_gap_start)
 
         i = 0
         while i < len(self._gaps):
@@ -539,17 +570,11 @@ class OrderedRingBuffer(Generic[FloatArray]):
         Args:
             timestamp: Timestamp that is no longer missing.
         """
-        gap_index, gap = next(
-            filter(
-                lambda gap: gap[1].contains(timestamp),
-                enumerate(self._gaps),
-            ),
-            (0, None),
-        )
-
-        if gap is None:
+        gap_index = self._find_gap(timestamp)
+        if gap_index is None:
             return
 
+        gap = self._gaps[gap_index]
         if gap.start == timestamp:
             # Is the whole gap consisting only of the timestamp?
             if gap.end == timestamp + self._sampling_period:
@@ -671,10 +696,7 @@ class OrderedRingBuffer(Generic[FloatArray]):
             The count of samples between the oldest and newest (inclusive) valid samples
                 or 0 if there are is no time range covered.
         """
-        return int(
-            self._covered_time_range().total_seconds()
-            // self._sampling_period.total_seconds()
-        )
+        return self._covered_time_range() // self._sampling_period
 
     def count_valid(self) -> int:
         """Count the number of valid items that this buffer currently holds.
@@ -61,4 +61,6 @@ def dump(  # noqa: DOC502 (OSError is raised indirectly by open and pickle.dump)
         OSError: When the file cannot be opened or written.
     """
     with open(path, mode="wb+") as fileobj:
-        pickle.dump((file_format_version, ringbuffer), fileobj)
+        # Protocol 5 writes NumPy buffers as a single raw frame instead of
+        # going through an intermediate bytes copy.
+        pickle.dump((file_format_version, ringbuffer), fileobj, protocol=5)
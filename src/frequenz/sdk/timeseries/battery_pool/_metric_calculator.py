@@ -183,14 +183,15 @@ class CapacityCalculator(MetricCalculator[Sample[Energy]]):
             Return None if there are no component metrics.
         """
         timestamp = _MIN_TIMESTAMP
-        total_capacity = 0.0
+        # The SoC bounds are in the 0-100 range, so the sum is divided by 100 only
+        # once, after all batteries have been added.
+        total_capacity_x100 = 0.0
 
         for battery_id in working_batteries:
-            if battery_id not in metrics_data:
+            metrics = metrics_data.get(battery_id)
+            if metrics is None:
                 continue
 
-            metrics = metrics_data[battery_id]
-
             capacity = metrics.get(ComponentMetricId.CAPACITY)
             soc_upper_bound = metrics.get(ComponentMetricId.SOC_UPPER_BOUND)
             soc_lower_bound = metrics.get(ComponentMetricId.SOC_LOWER_BOUND)
@@ -198,14 +199,15 @@ class CapacityCalculator(MetricCalculator[Sample[Energy]]):
             # All metrics are related so if any is missing then we skip the component.
             if capacity is None or soc_lower_bound is None or soc_upper_bound is None:
                 continue
-            usable_capacity = capacity * (soc_upper_bound - soc_lower_bound) / 100
             timestamp = max(timestamp, metrics.timestamp)
-            total_capacity += usable_capacity
+            total_capacity_x100 += capacity * (soc_upper_bound - soc_lower_bound)
 
         return (
             Sample(datetime.now(tz=timezone.utc), None)
             if timestamp == _MIN_TIMESTAMP
-            else Sample[Energy](timestamp, Energy.from_watt_hours(total_capacity))
+            else Sample[Energy](
+                timestamp, Energy.from_watt_hours(total_capacity_x100 / 100)
+            )
         )
 
 
@@ -368,11 +370,10 @@ class SoCCalculator(MetricCalculator[Sample[Percentage]]):
         total_capacity_x100: float = 0.0
 
         for battery_id in working_batteries:
-            if battery_id not in metrics_data:
+            metrics = metrics_data.get(battery_id)
+            if metrics is None:
                 continue
 
-            metrics = metrics_data[battery_id]
-
             capacity = metrics.get(ComponentMetricId.CAPACITY)
             soc_upper_bound = metrics.get(ComponentMetricId.SOC_UPPER_BOUND)
             soc_lower_bound = metrics.get(ComponentMetricId.SOC_LOWER_BOUND)
@@ -435,8 +436,10 @@ class PowerBoundsCalculator(MetricCalculator[SystemBounds]):
         Args:
             batteries: What batteries should be used for calculation.
         """
-        mappings: dict[str, dict[int, frozenset[int]]] = _get_battery_inverter_mappings(
-            batteries, inv_bats=False, bat_bats=True, inv_invs=False
+        mappings: dict[str, dict[int, tuple[int, ...]]] = (
+            _get_battery_inverter_mappings(
+                batteries, inv_bats=False, bat_bats=True, inv_invs=False
+            )
         )
 
         self._bat_inv_map = mappings["bat_invs"]
@@ -561,7 +564,7 @@ class PowerBoundsCalculator(MetricCalculator[SystemBounds]):
             )
 
         def get_bounds_list(
-            comp_ids: frozenset[int], comp_metric_ids: list[ComponentMetricId]
+            comp_ids: tuple[int, ...], comp_metric_ids: list[ComponentMetricId]
         ) -> list[PowerBounds]:
             return list(
                 x
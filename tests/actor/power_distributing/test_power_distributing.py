@@ -187,14 +187,14 @@ class TestPowerDistributingActor:
             ) as distributor:
                 assert isinstance(distributor._component_manager, BatteryManager)
                 assert distributor._component_manager._bat_invs_map == {
-                    9: {8},
-                    19: {18},
-                    29: {28},
+                    9: (8,),
+                    19: (18,),
+                    29: (28,),
                 }
                 assert distributor._component_manager._inv_bats_map == {
-                    8: {9},
-                    18: {19},
-                    28: {29},
+                    8: (9,),
+                    18: (19,),
+                    28: (29,),
                 }
 
     async def test_constructor_without_grid_meter(self, mocker: MockerFixture) -> None:
@@ -214,14 +214,14 @@ class TestPowerDistributingActor:
             ) as distributor:
                 assert isinstance(distributor._component_manager, BatteryManager)
                 assert distributor._component_manager._bat_invs_map == {
-                    9: {8},
-                    19: {18},
-                    29: {28},
+                    9: (8,),
+                    19: (18,),
+                    29: (28,),
                 }
                 assert distributor._component_manager._inv_bats_map == {
-                    8: {9},
-                    18: {19},
-                    28: {29},
+                    8: (9,),
+                    18: (19,),
+                    28: (29,),
                 }
 
     async def init_component_data(
@@ -29,6 +29,7 @@ from frequenz.sdk.timeseries._resampling import (
     SourceProperties,
     SourceStoppedError,
     _ResamplingHelper,
+    average,
 )
 
 from ..utils import a_sequence
@@ -1113,6 +1114,37 @@ async def test_receiving_resampling_error(fake_time: time_machine.Coordinates) -
     assert isinstance(timeseries_error, TestException)
 
 
+async def test_receiving_cancelled_resampling_error(
+    fake_time: time_machine.Coordinates, source_chan: Broadcast[Sample[Quantity]]
+) -> None:
+    """Test resampling errors if the receiving task was cancelled."""
+    resampling_period_s = 2
+    resampler = Resampler(
+        ResamplerConfig(resampling_period=timedelta(seconds=resampling_period_s))
+    )
+
+    source_receiver = source_chan.new_receiver()
+    sink_mock = AsyncMock(spec=Sink, return_value=True)
+    resampler.add_timeseries("test", source_receiver, sink_mock)
+
+    # pylint: disable=protected-access
+    receiving_task = resampler._resamplers[source_receiver]._receiving_task
+    receiving_task.cancel()
+    with pytest.raises(asyncio.CancelledError):
+        await receiving_task
+
+    # The resampler task itself is not cancelled, so the cancellation of the
+    # receiving task should be reported as a resampling error.
+    await _advance_time(fake_time, resampling_period_s)
+    with pytest.raises(ResamplingError) as excinfo:
+        await resampler.resample(one_shot=True)
+
+    exceptions = excinfo.value.exceptions
+    assert len(exceptions) == 1
+    assert isinstance(exceptions[source_receiver], asyncio.CancelledError)
+    sink_mock.assert_not_called()
+
+
 async def test_timer_is_aligned(
     fake_time: time_machine.Coordinates,
     source_chan: Broadcast[Sample[Quantity]],
@@ -1306,6 +1338,76 @@ async def test_resampling_all_zeros(
     assert _get_buffer_len(resampler, source_receiver) == 3
 
 
+def test_helper_buffer_wraps_around() -> None:
+    """Test the resampling buffer keeps the newest samples when full."""
+    config = ResamplerConfig(
+        resampling_period=timedelta(seconds=10.0),
+        max_data_age_in_periods=1.0,
+        initial_buffer_len=4,
+    )
+    helper = _ResamplingHelper("test", config)
+
+    now = datetime.now(timezone.utc)
+    samples = [Sample(now + timedelta(seconds=i), Quantity(float(i))) for i in range(9)]
+    for sample in samples:
+        helper.add_sample(sample)
+
+    # pylint: disable=protected-access
+    assert len(helper._buffer) == 4
+    assert list(helper._buffer) == samples[5:]
+    assert helper.resample(now + timedelta(seconds=9)) == Sample(
+        now + timedelta(seconds=9), Quantity(6.5)
+    )
+
+
+def test_helper_buffer_shrinks_keeping_newest() -> None:
+    """Test shrinking the resampling buffer keeps the newest samples."""
+    config = ResamplerConfig(
+        resampling_period=timedelta(seconds=4.0),
+        max_data_age_in_periods=1.0,
+        initial_buffer_len=8,
+    )
+    helper = _ResamplingHelper("test", config)
+
+    now = datetime.now(timezone.utc)
+    samples = [Sample(now + timedelta(seconds=i), Quantity(float(i))) for i in range(8)]
+    for sample in samples:
+        helper.add_sample(sample)
+
+    # pylint: disable=protected-access
+    helper._source_properties.sampling_period = timedelta(seconds=1.0)
+    assert helper._update_buffer_len()
+    assert helper._buffer.maxlen == 4
+    assert list(helper._buffer) == samples[4:]
+
+
+def test_helper_average_skips_missing_values() -> None:
+    """Test the resampling helper ignores samples without value when averaging."""
+    config = ResamplerConfig(resampling_period=timedelta(seconds=10.0))
+    helper = _ResamplingHelper("test", config)
+
+    now = datetime.now(timezone.utc)
+    helper.add_sample(Sample(now, Quantity(1.0)))
+    helper.add_sample(Sample(now + timedelta(seconds=1), None))
+    helper.add_sample(Sample(now + timedelta(seconds=2), Quantity(4.0)))
+
+    assert helper.resample(now + timedelta(seconds=3)) == Sample(
+        now + timedelta(seconds=3), Quantity(2.5)
+    )
+
+
+def test_average_skips_missing_values() -> None:
+    """Test the average resampling function ignores samples without value."""
+    config = ResamplerConfig(resampling_period=timedelta(seconds=1.0))
+    now = datetime.now(timezone.utc)
+    samples: list[Sample[Quantity]] = [
+        Sample(now, Quantity(1.0)),
+        Sample(now + timedelta(seconds=1), None),
+        Sample(now + timedelta(seconds=2), Quantity(4.0)),
+    ]
+    assert average(samples, config, SourceProperties()) == 2.5
+
+
 def _get_buffer_len(resampler: Resampler, source_receiver: Source) -> int:
     # pylint: disable=protected-access
     blen = resampler._resamplers[source_receiver]._helper._buffer.maxlen
@@ -699,3 +699,60 @@ def test_get_timestamp() -> None:
     assert dt(10) == buffer.get_timestamp(0)
     assert dt(15) == buffer.get_timestamp(5)
     assert dt(16) == buffer.get_timestamp(6)
+
+
+@pytest.mark.parametrize(
+    "sampling_period, align_offset",
+    [
+        (FIVE_MINUTES, timedelta(seconds=7)),
+        (TWO_HUNDRED_MS, timedelta(milliseconds=70)),
+    ],
+)
+def test_to_internal_index_unaligned(
+    sampling_period: timedelta, align_offset: timedelta
+) -> None:
+    """Test to_internal_index with an alignment off the sampling period grid."""
+    align_to = datetime(2023, 1, 1, tzinfo=timezone.utc) + align_offset
+    buffer = OrderedRingBuffer(
+        np.empty(shape=12, dtype=float),
+        sampling_period=sampling_period,
+        align_to=align_to,
+    )
+
+    for i in range(18):
+        timestamp = align_to + i * sampling_period
+        buffer.update(Sample(timestamp, Quantity(float(i))))
+
+        assert buffer.to_internal_index(timestamp) == i % 12
+        assert buffer[buffer.to_internal_index(timestamp)] == float(i)
+        # Timestamps off the grid map to the position of the closest sample.
+        assert buffer.to_internal_index(timestamp - sampling_period / 3) == i % 12
+        assert buffer.to_internal_index(timestamp + sampling_period / 3) == i % 12
+        assert buffer.to_internal_index(timestamp - sampling_period * 2 / 3) == (
+            (i - 1) % 12
+        )
+
+
+def test_count_covered_unaligned() -> None:
+    """Test count_covered with an alignment off the sampling period grid."""
+    align_to = datetime(2023, 1, 1, tzinfo=timezone.utc) + timedelta(seconds=7)
+    buffer = OrderedRingBuffer(
+        np.empty(shape=12, dtype=float),
+        sampling_period=FIVE_MINUTES,
+        align_to=align_to,
+    )
+    assert buffer.count_covered() == 0
+
+    for i in range(5):
+        buffer.update(Sample(align_to + i * FIVE_MINUTES, Quantity(float(i))))
+        assert buffer.count_covered() == i + 1
+
+    # Skipping samples leaves a gap, which is still covered.
+    buffer.update(Sample(align_to + 8 * FIVE_MINUTES, Quantity(8.0)))
+    assert buffer.count_covered() == 9
+
+    # Wrapping around drops the oldest samples from the covered range.
+    buffer.update(Sample(align_to + 14 * FIVE_MINUTES, Quantity(14.0)))
+    assert buffer.count_covered() == 12
+    buffer.update(Sample(align_to + 16 * FIVE_MINUTES, Quantity(16.0)))
+    assert buffer.count_covered() == 9
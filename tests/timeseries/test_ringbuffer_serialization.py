@@ -4,8 +4,8 @@
 """Tests for the `SerializableRingBuffer` class."""
 
 
-import random
 from datetime import datetime, timedelta, timezone
+from pathlib import Path
 from typing import Any
 
 import numpy as np
@@ -20,27 +20,31 @@ _29_DAYS = 60 * 24 * 29
 ONE_MINUTE = timedelta(minutes=1)
 
 
+@pytest.fixture(scope="module")
+def load_dump_dir(tmp_path_factory: pytest.TempPathFactory) -> Path:
+    """Create a temporary directory shared by all the load/dump tests."""
+    return tmp_path_factory.mktemp("load_dump")
+
+
 def load_dump_test(dumped: rb.OrderedRingBuffer[Any], path: str) -> None:
     """Test ordered ring buffer."""
     size = dumped.maxlen
 
-    random.seed(0)
-
     # Fill with data so we have something to compare
     # Avoiding .update() because it takes very long for 40k entries
-    for i in range(size):
-        dumped._buffer[i] = i  # pylint: disable=protected-access
+    values = np.arange(size, dtype=np.float64)
+    # pylint: disable=protected-access
+    if isinstance(dumped._buffer, np.ndarray):
+        dumped._buffer[:] = values
+    else:
+        dumped._buffer[:] = values.tolist()
 
     # But use update a bit so the timestamp and gaps are initialized
+    timestamp = datetime.fromtimestamp(200, tz=timezone.utc)
+    step = 100 * FIVE_MINUTES
     for i in range(0, size, 100):
-        dumped.update(
-            Sample(
-                datetime.fromtimestamp(
-                    200 + i * FIVE_MINUTES.total_seconds(), tz=timezone.utc
-                ),
-                Quantity(i),
-            )
-        )
+        dumped.update(Sample(timestamp, Quantity(i)))
+        timestamp += step
 
     rb.dump(dumped, path)
 
@@ -49,63 +53,62 @@ def load_dump_test(dumped: rb.OrderedRingBuffer[Any], path: str) -> None:
     loaded = rb.load(path)
     assert loaded is not None
 
-    np.testing.assert_equal(dumped[:], loaded[:])
+    np.testing.assert_array_equal(dumped[:], loaded[:])
 
-    # pylint: disable=protected-access
-    assert dumped._timestamp_oldest == loaded._timestamp_oldest
-    # pylint: disable=protected-access
-    assert dumped._timestamp_newest == loaded._timestamp_newest
-    # pylint: disable=protected-access
-    assert len(dumped._gaps) == len(loaded._gaps)
-    # pylint: disable=protected-access
-    assert dumped._gaps == loaded._gaps
-    # pylint: disable=protected-access
-    assert dumped._sampling_period == loaded._sampling_period
-    # pylint: disable=protected-access
-    assert dumped._time_index_alignment == loaded._time_index_alignment
+    attrs = (
+        "_timestamp_oldest",
+        "_timestamp_newest",
+        "_gaps",
+        "_sampling_period",
+        "_time_index_alignment",
+    )
+    assert {a: getattr(dumped, a) for a in attrs} == {
+        a: getattr(loaded, a) for a in attrs
+    }
 
 
-def test_load_dump_short(tmp_path_factory: pytest.TempPathFactory) -> None:
-    """Short test to perform loading & dumping."""
-    tmpdir = tmp_path_factory.mktemp("load_dump")
-
-    load_dump_test(
+@pytest.mark.parametrize(
+    "buffer",
+    [
         rb.OrderedRingBuffer(
             [0.0] * int(24 * FIVE_MINUTES.total_seconds()),
             FIVE_MINUTES,
             datetime(2, 2, 2, tzinfo=timezone.utc),
         ),
-        f"{tmpdir}/test_list.bin",
-    )
-
-    load_dump_test(
         rb.OrderedRingBuffer(
             np.empty(shape=(24 * int(FIVE_MINUTES.total_seconds()),), dtype=np.float64),
             FIVE_MINUTES,
             datetime(2, 2, 2, tzinfo=timezone.utc),
         ),
-        f"{tmpdir}/test_array.bin",
-    )
+    ],
+    ids=["list", "array"],
+)
+def test_load_dump_short(
+    buffer: rb.OrderedRingBuffer[Any], load_dump_dir: Path
+) -> None:
+    """Short test to perform loading & dumping."""
+    # The directory is shared, so each container type needs its own file.
+    container = type(buffer._buffer).__name__  # pylint: disable=protected-access
+    load_dump_test(buffer, f"{load_dump_dir}/test_short_{container}.bin")
 
 
-def test_load_dump(tmp_path_factory: pytest.TempPathFactory) -> None:
-    """Test to load/dump 29 days of 1-minute samples."""
-    tmpdir = tmp_path_factory.mktemp("load_dump")
-
-    load_dump_test(
+@pytest.mark.parametrize(
+    "buffer",
+    [
         rb.OrderedRingBuffer(
             [0.0] * _29_DAYS,
             ONE_MINUTE,
             datetime(2, 2, 2, tzinfo=timezone.utc),
         ),
-        f"{tmpdir}/test_list_29.bin",
-    )
-
-    load_dump_test(
         rb.OrderedRingBuffer(
             np.empty(shape=(_29_DAYS,), dtype=np.float64),
             ONE_MINUTE,
             datetime(2, 2, 2, tzinfo=timezone.utc),
         ),
-        f"{tmpdir}/test_array_29.bin",
-    )
+    ],
+    ids=["list", "array"],
+)
+def test_load_dump(buffer: rb.OrderedRingBuffer[Any], load_dump_dir: Path) -> None:
+    """Test to load/dump 29 days of 1-minute samples."""
+    container = type(buffer._buffer).__name__  # pylint: disable=protected-access
+    load_dump_test(buffer, f"{load_dump_dir}/test_29_{container}.bin")